@@ -202,12 +202,12 @@ def diff_one(model1: TModelType, model2: TModelType, **kwargs) -> List[str]:  #
         else:
             changes.append(drop_index(model1, name))
 
-    # Check additional compound indexes
-    indexes1 = meta1.indexes
-    indexes2 = meta2.indexes
+    # Check additional compound indexes (dicts keep the declaration order)
+    indexes1 = dict.fromkeys(meta1.indexes)
+    indexes2 = dict.fromkeys(meta2.indexes)
 
     # Drop compound indexes
-    indexes_to_drop = set(indexes2) - set(indexes1)
+    indexes_to_drop = [index for index in indexes2 if index not in indexes1]
     changes.extend(
         drop_index(model1, name=index[0])
         for index in indexes_to_drop
@@ -215,7 +215,7 @@ def diff_one(model1: TModelType, model2: TModelType, **kwargs) -> List[str]:  #
     )
 
     # Add compound indexes
-    indexes_to_add = set(indexes1) - set(indexes2)
+    indexes_to_add = [index for index in indexes1 if index not in indexes2]
     changes.extend(
         add_index(model1, name=index[0], unique=index[1])
         for index in indexes_to_add
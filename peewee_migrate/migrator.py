@@ -251,7 +251,8 @@ class Migrator:
         """
         model = self.__get_model__(model)
         meta = model._meta  # type: ignore[]
-        fields = [field for field in meta.fields.values() if field.name in names]
+        names_ = set(names)
+        fields = [field for field in meta.fields.values() if field.name in names_]
         for field in fields:
             self.__del_field__(model, field)
             if field.unique:
@@ -5,16 +5,30 @@ import os
 import pkgutil
 import re
 import sys
+from contextlib import contextmanager
 from functools import cached_property
 from importlib import import_module
 from pathlib import Path
-from types import ModuleType
-from typing import TYPE_CHECKING, Any, Final, Iterable, List, Optional, Set, Type, Union
+from types import CodeType, ModuleType
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Dict,
+    Final,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Type,
+    Union,
+)
 from unittest import mock
 
 import peewee as pw
 
-from .auto import NEWLINE, diff_many
+from .auto import INDENT, diff_many
 from .logs import logger
 from .migrator import Migrator
 from .models import MIGRATE_TABLE, MigrateHistory
@@ -26,9 +40,12 @@ if TYPE_CHECKING:
     from peewee_migrate.types import TModelType
 
 
-CLEAN_RE: Final = re.compile(r"\s+$", re.M)
 CURDIR: Final = Path.cwd()
 DEFAULT_MIGRATE_DIR: Final = CURDIR / "migrations"
+DEFAULT_FILEMASK: Final = re.compile(r"[\d]{3}_[^\.]+\.py$")
+
+# Compiled migrations by path: (mtime_ns, size, code)
+_CODE_CACHE: Dict[Path, Tuple[int, int, CodeType]] = {}
 
 
 def void(m, d, fake=None):
@@ -77,22 +94,38 @@ class BaseRouter(object):
     @property
     def done(self) -> List[str]:
         """Scan migrations in database."""
-        return [mm.name for mm in self.model.select().order_by(self.model.id)]
+        model = self.model
+        return [name for (name,) in model.select(model.name).order_by(model.id).tuples()]
 
     @property
     def diff(self) -> List[str]:
         """Calculate difference between fs and db."""
-        done = set(self.done)
-        return [name for name in self.todo if name not in done]
+        return self._diff(self.done)
 
     @cached_property
     def migrator(self) -> Migrator:
         """Create migrator and setup it with fake migrations."""
+        return self._setup_migrator(self.done)
+
+    def _diff(self, done: List[str]) -> List[str]:
+        """Calculate difference between fs and the given applied migrations."""
+        done_ = set(done)
+        return [name for name in self.todo if name not in done_]
+
+    def _setup_migrator(self, done: List[str]) -> Migrator:
+        """Create migrator and setup it with the given applied migrations."""
         migrator = self.migrator_class(self.database)
-        for name in self.done:
+        for name in done:
             self.run_one(name, migrator)
         return migrator
 
+    def _get_migrator(self, done: List[str]) -> Migrator:
+        """Get the cached migrator or set it up from the already scanned migrations."""
+        migrator = self.__dict__.get("migrator")
+        if migrator is None:
+            migrator = self.migrator = self._setup_migrator(done)
+        return migrator
+
     def create(self, name: str = "auto", *, auto: Any = False) -> Optional[str]:
         """Create a migration.
 
@@ -101,7 +134,9 @@ class BaseRouter(object):
         migrate = rollback = ""
         if auto:
             # Need to append the CURDIR to the path for import to work.
-            sys.path.append(f"{ CURDIR }")
+            curdir = str(CURDIR)
+            if curdir not in sys.path:
+                sys.path.append(curdir)
             models = auto if isinstance(auto, list) else [auto]
             if not all(_check_model(m) for m in models):
                 try:
@@ -117,17 +152,20 @@ class BaseRouter(object):
                     return None
 
             if self.ignore:
-                models = [m for m in models if m._meta.name not in self.ignore]  # type: ignore[]
+                ignore = set(self.ignore)
+                models = [m for m in models if m._meta.name not in ignore]  # type: ignore[]
 
-            for migration in self.diff:
-                self.run_one(migration, self.migrator, fake=True)
+            applied = self.done
+            migrator = self._get_migrator(applied)
+            for migration in self._diff(applied):
+                self.run_one(migration, migrator, fake=True)
 
-            migrate = compile_migrations(self.migrator, models)
+            migrate = compile_migrations(migrator, models)
             if not migrate:
                 self.logger.warning("No changes found.")
                 return None
 
-            rollback = compile_migrations(self.migrator, models, reverse=True)
+            rollback = compile_migrations(migrator, models, reverse=True)
 
         self.logger.info('Creating migration "%s"', name)
         name = self.compile(name, migrate, rollback)
@@ -176,15 +214,12 @@ class BaseRouter(object):
         force: bool = False,
     ) -> str:
         """Run/emulate a migration with given name."""
+        database = self.database
         try:
             migrate, rollback = self.read(name)
             if fake:
-                mocked_cursor = mock.Mock()
-                mocked_cursor.fetch_one.return_value = None
-                with mock.patch("peewee.Model.select"), mock.patch(
-                    "peewee.Database.execute_sql", return_value=mocked_cursor
-                ):
-                    migrate(migrator, self.database, fake=fake)
+                with _fake_queries():
+                    migrate(migrator, database, fake=fake)
 
                 if force:
                     self.model.create(name=name)
@@ -193,23 +228,24 @@ class BaseRouter(object):
                 migrator.__ops__ = []
                 return name
 
-            with self.database.transaction():
+            model = self.model
+            with database.transaction():
                 if not downgrade:
                     self.logger.info('Migrate "%s"', name)
-                    migrate(migrator, self.database, fake=fake)
+                    migrate(migrator, database, fake=fake)
                     migrator()
-                    self.model.create(name=name)
+                    model.create(name=name)
                 else:
                     self.logger.info("Rolling back %s", name)
-                    rollback(migrator, self.database, fake=fake)
+                    rollback(migrator, database, fake=fake)
                     migrator()
-                    self.model.delete().where(self.model.name == name).execute()
+                    model.delete().where(model.name == name).execute()
 
                 self.logger.info("Done %s", name)
                 return name
 
         except Exception:
-            self.database.rollback()
+            database.rollback()
             operation = "Migration" if not downgrade else "Rollback"
             self.logger.exception("%s failed: %s", operation, name)
             raise
@@ -219,14 +255,16 @@ class BaseRouter(object):
         self.logger.info("Starting migrations")
 
         done: List[str] = []
-        diff = self.diff
+        applied = self.done
+        diff = self._diff(applied)
         if not diff:
             self.logger.info("There is nothing to migrate")
             return done
 
-        migrator = self.migrator
+        migrator = self._get_migrator(applied)
+        run_one = self.run_one
         for mname in diff:
-            done.append(self.run_one(mname, migrator, fake=fake, force=fake))
+            done.append(run_one(mname, migrator, fake=fake, force=fake))
             if name and name == mname:
                 break
 
@@ -240,7 +278,7 @@ class BaseRouter(object):
             raise RuntimeError(msg)
 
         name = done[-1]
-        migrator = self.migrator
+        migrator = self._get_migrator(done)
         self.run_one(name, migrator, fake=False, downgrade=True)
         self.logger.warning("Downgraded migration: %s", name)
 
@@ -248,7 +286,7 @@ class BaseRouter(object):
 class Router(BaseRouter):
     """File system router."""
 
-    filemask = re.compile(r"[\d]{3}_[^\.]+\.py$")
+    filemask = DEFAULT_FILEMASK
 
     def __init__(
         self,
@@ -270,7 +308,13 @@ class Router(BaseRouter):
         if not self.migrate_dir.exists():
             self.logger.warning("Migration directory: %s does not exist.", self.migrate_dir)
             self.migrate_dir.mkdir(parents=True)
-        return sorted(f[:-3] for f in os.listdir(self.migrate_dir) if self.filemask.match(f))
+        filemask = self.filemask
+        # Skip the regex engine unless the filemask is customized
+        match = _is_migration if filemask is DEFAULT_FILEMASK else filemask.match
+        with os.scandir(self.migrate_dir) as entries:
+            return sorted(
+                entry.name[:-3] for entry in entries if match(entry.name) and entry.is_file()
+            )
 
     def compile(self, name, migrate="", rollback="", num=None) -> str:  # noqa: A003
         """Create a migration."""
@@ -280,20 +324,26 @@ class Router(BaseRouter):
         name = "{:03}_".format(num + 1) + name
         filename = name + ".py"
         path = self.migrate_dir / filename
-        with path.open("w") as f:
-            f.write(TEMPLATE.format(migrate=migrate, rollback=rollback, name=filename))
+        path.write_text(
+            TEMPLATE.format(migrate=migrate, rollback=rollback, name=filename), encoding="utf-8"
+        )
 
         return name
 
-    def read(self, name):
+    def read(self, name: str):
         """Read migration from file."""
-        path = self.migrate_dir / (name + ".py")
-        with path.open("r") as f:
-            code = f.read()
-            scope = {}
-            code = compile(code, "<string>", "exec", dont_inherit=True)
-            exec(code, scope, None)
-            return scope.get("migrate", void), scope.get("rollback", void)
+        path = (self.migrate_dir / (name + ".py")).absolute()
+        stat = path.stat()
+        cached = _CODE_CACHE.get(path)
+        if cached and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+            code = cached[2]
+        else:
+            code = compile(path.read_bytes(), str(path), "exec", dont_inherit=True)
+            _CODE_CACHE[path] = stat.st_mtime_ns, stat.st_size, code
+
+        scope: Dict[str, Any] = {}
+        exec(code, scope, None)
+        return scope.get("migrate", void), scope.get("rollback", void)
 
     def clear(self):
         """Remove migrations from fs."""
@@ -301,6 +351,7 @@ class Router(BaseRouter):
         for name in self.todo:
             path = self.migrate_dir / (name + ".py")
             path.unlink()
+            _CODE_CACHE.pop(path.absolute(), None)
 
 
 class ModuleRouter(BaseRouter):
@@ -328,7 +379,7 @@ def load_models(module: Union[str, ModuleType]) -> Set[Type[pw.Model]]:
     return {
         m
         for module in modules
-        for m in filter(_check_model, (getattr(module, name) for name in dir(module)))
+        for m in filter(_check_model, vars(module).values())
     }
 
 
@@ -337,7 +388,7 @@ def _import_submodules(package, passed=...):
         passed = set()
 
     if isinstance(package, str):
-        package = import_module(package)
+        package = _cached_import(package)
 
     # https://github.com/klen/peewee_migrate/issues/125
     if not hasattr(package, "__path__"):
@@ -349,17 +400,49 @@ def _import_submodules(package, passed=...):
 
     passed |= set(package.__path__)
 
-    for loader, name, is_pkg in pkgutil.walk_packages(package.__path__, package.__name__ + "."):
-        spec = loader.find_spec(name, None)
-        if spec is None or spec.loader is None:
-            continue
-        module = spec.loader.load_module(name)
+    for _, name, is_pkg in pkgutil.iter_modules(package.__path__, package.__name__ + "."):
+        module = _cached_import(name)
         modules.append(module)
         if is_pkg:
-            modules += _import_submodules(module)
+            modules += _import_submodules(module, passed)
     return modules
 
 
+@contextmanager
+def _fake_queries() -> Iterator[None]:
+    """Disable queries execution while a migration is emulated."""
+    mocked_cursor = mock.Mock()
+    mocked_cursor.fetch_one.return_value = None
+    select, execute_sql = pw.Model.__dict__["select"], pw.Database.execute_sql
+    pw.Model.select = mock.MagicMock()
+    pw.Database.execute_sql = mock.Mock(return_value=mocked_cursor)
+    try:
+        yield
+    finally:
+        pw.Model.select = select
+        pw.Database.execute_sql = execute_sql
+
+
+def _is_migration(filename: str) -> bool:
+    """Check the filename against DEFAULT_FILEMASK."""
+    return (
+        len(filename) > 7
+        and filename.endswith(".py")
+        and filename[:3].isdecimal()
+        and filename[3] == "_"
+        and "." not in filename[4:-3]
+    )
+
+
+def _cached_import(name: str) -> ModuleType:
+    """Import a module by name, reusing an already initialized one from sys.modules."""
+    module = sys.modules.get(name)
+    spec = getattr(module, "__spec__", None)
+    if module is None or spec is None or getattr(spec, "_initializing", False):
+        module = import_module(name)
+    return module
+
+
 def _check_model(obj):
     """Check object if it's a peewee model and unique."""
     return isinstance(obj, type) and issubclass(obj, pw.Model) and hasattr(obj, "_meta")
@@ -375,5 +458,10 @@ def compile_migrations(migrator: Migrator, models: List[TModelType], *, reverse=
     if not migrations:
         return ""
 
-    code = NEWLINE + NEWLINE.join("\n\n".join(migrations).split("\n"))
-    return CLEAN_RE.sub("\n", code)
+    lines = [""]
+    for source_line in "\n\n".join(migrations).split("\n"):
+        line = (INDENT + source_line).rstrip()
+        # Collapse runs of blank lines into one
+        if line or lines[-1]:
+            lines.append(line)
+    return "\n".join(lines)
@@ -1,5 +1,8 @@
 from __future__ import annotations
 
+import shutil
+from pathlib import Path
+
 import pytest
 from peewee import CharField, ForeignKeyField, IntegerField, Model
 
@@ -16,6 +19,9 @@ class Order(Model):
     customer = ForeignKeyField(Customer, column_name="customer_id")
 
 
+MIGRATIONS_DIR = Path(__file__).parent / "migrations"
+
+
 @pytest.fixture()
 def dburl():
     return "sqlite:///:memory:"
@@ -31,6 +37,13 @@ def router(dburl):
     return Router(database)
 
 
+@pytest.fixture()
+def migrations_dir(tmp_path):
+    migrations_dir = tmp_path / "migrations"
+    shutil.copytree(MIGRATIONS_DIR, migrations_dir, ignore=shutil.ignore_patterns("__pycache__"))
+    return migrations_dir
+
+
 @pytest.fixture()
 def migrator(database):
     from peewee_migrate import Migrator
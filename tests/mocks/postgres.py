@@ -1,3 +1,5 @@
+from collections import deque
+
 from psycopg2.extensions import connection, cursor
 
 
@@ -13,10 +15,12 @@ class MockConnection(connection):
 
 class MockCursor(cursor):
     def __init__(self, *args, **kwargs):
-        self.queries = []
+        self.queries = deque(maxlen=10_000)
+        self.params = deque(maxlen=10_000)
 
-    def execute(self, query, *args, **kwargs):
+    def execute(self, query, params=None, *args, **kwargs):
         self.queries.append(query)
+        self.params.append(params)
 
     def fetchall(self, *args, **kwargs):
         return []
@@ -174,6 +174,34 @@ def test_diff_multi_column_index():
     )
 
 
+def test_diff_multi_column_indexes_order():
+    from peewee_migrate.auto import diff_one
+
+    class Object(pw.Model):
+        first_name = pw.CharField()
+        last_name = pw.CharField()
+        email = pw.CharField()
+
+    class ObjectWithIndexes(pw.Model):
+        first_name = pw.CharField()
+        last_name = pw.CharField()
+        email = pw.CharField()
+
+        class Meta:
+            indexes = (
+                (("last_name", "first_name"), False),
+                (("email", "last_name"), True),
+                (("first_name", "email"), False),
+            )
+
+    changes = diff_one(ObjectWithIndexes, Object)
+    assert changes == [
+        "migrator.add_index('objectwithindexes', 'last_name', 'first_name', unique=False)",
+        "migrator.add_index('objectwithindexes', 'email', 'last_name', unique=True)",
+        "migrator.add_index('objectwithindexes', 'first_name', 'email', unique=False)",
+    ]
+
+
 def test_diff_default():
     from peewee_migrate.auto import compare_fields
 
@@ -32,8 +32,9 @@ def router(tmpdir, db_url):
 def migrations(router):
     migrations_number = 5
     name = "test"
+    router_ = router()
     for _i in range(migrations_number):
-        router().create(name)
+        router_.create(name)
     return ["00%s_test" % i for i in range(1, migrations_number + 1)]
 
 
@@ -71,25 +72,26 @@ def test_list(dir_option, db_option, migrations):
 
 
 def test_rollback(dir_option, db_option, router, migrations):
-    router().run()
+    router_ = router()
+    router_.run()
 
     count_overflow = len(migrations) + 1
     result = runner.invoke(cli, ["rollback", dir_option, db_option, "--count=%s" % count_overflow])
     assert result.exception
     assert "Unable to rollback %s migrations" % count_overflow in result.exception.args[0]
-    assert router().done == migrations
+    assert router_.done == migrations
 
     result = runner.invoke(cli, ["rollback", dir_option, db_option])
     assert not result.exception
-    assert router().done == migrations[:-1]
+    assert router_.done == migrations[:-1]
 
     result = runner.invoke(cli, ["rollback", dir_option, db_option])
     assert not result.exception
-    assert router().done == migrations[:-2]
+    assert router_.done == migrations[:-2]
 
     result = runner.invoke(cli, ["rollback", dir_option, db_option, "--count=2"])
     assert not result.exception
-    assert router().done == migrations[:-4]
+    assert router_.done == migrations[:-4]
 
 
 def test_fake(dir_option, db_option, migrations, router):
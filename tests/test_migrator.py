@@ -4,7 +4,6 @@ from typing import TYPE_CHECKING
 
 import peewee as pw
 import pytest
-from playhouse.test_utils import count_queries
 
 if TYPE_CHECKING:
     from peewee_migrate import Migrator
@@ -98,7 +97,7 @@ def test_migrator(router):  # noqa: PLR0915
     migrator()
 
     migrator.change_fields(Order, identifier=pw.IntegerField(default=0))
-    assert not Order._meta.indexes  # type: ignore[]
+    assert not meta.indexes
 
 
 def test_migrator_fake(migrator: Migrator):
@@ -232,19 +231,21 @@ def test_change_field_default(migrator: Migrator, database):
         "testtable",
         field_with_default=pw.CharField(default=22),
     )
-    with count_queries() as counter:
-        migrator()
+    cursor = database.cursor()
+    cursor.queries.clear()
+    cursor.params.clear()
+    migrator()
 
-    queries = counter.get_queries()
-    assert queries[0].msg == (
+    queries = list(zip(cursor.queries, cursor.params))
+    assert queries[0] == (
         'ALTER TABLE "testtable" ALTER COLUMN "field_with_default" TYPE VARCHAR(255)',
-        [],
+        (),
     )
-    assert queries[1].msg == (
+    assert queries[1] == (
         'ALTER TABLE "testtable" ALTER COLUMN "field_with_default" SET DEFAULT %s',
         ["22"],
     )
-    assert queries[2].msg == (
+    assert queries[2] == (
         'ALTER TABLE "testtable" ALTER COLUMN "field_with_default" SET NOT NULL',
-        [],
+        (),
     )
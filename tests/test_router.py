@@ -1,22 +1,32 @@
 """Tests for `peewee_migrate` module."""
 from __future__ import annotations
 
-from pathlib import Path
+import re
 from unittest import mock
 
 import peewee as pw
+import pytest
 
-MIGRATIONS_DIR = Path(__file__).parent / "migrations"
+from peewee_migrate import Migrator
+from peewee_migrate.cli import get_router
+from peewee_migrate.models import MigrateHistory
+from peewee_migrate.router import (
+    _CODE_CACHE,
+    DEFAULT_FILEMASK,
+    Router,
+    _is_migration,
+    compile_migrations,
+    load_models,
+    void,
+)
 
 
-def test_router():
-    from peewee_migrate.cli import get_router
-    from peewee_migrate.models import MigrateHistory
+class Dummy(pw.Model):
+    id = pw.AutoField()
 
-    class Dummy(pw.Model):
-        id = pw.AutoField()
 
-    router = get_router(MIGRATIONS_DIR, "sqlite:///:memory:")
+def test_router(migrations_dir):
+    router = get_router(migrations_dir, "sqlite:///:memory:")
 
     assert router.database
     assert isinstance(router.database, pw.Database)
@@ -25,30 +35,10 @@ def test_router():
     assert router.done == []
     assert router.diff == ["001_test", "002_test", "003_tespy"]
 
-    router.create("new")
-    assert router.todo == ["001_test", "002_test", "003_tespy", "004_new"]
-    (MIGRATIONS_DIR / "004_new.py").unlink()
-
-    router.create("new1", auto=Dummy)
-    assert router.todo == ["001_test", "002_test", "003_tespy", "004_new1"]
-    (MIGRATIONS_DIR / "004_new1.py").unlink()
-
-    router.create("new2", auto=[Dummy])
-    assert router.todo == ["001_test", "002_test", "003_tespy", "004_new2"]
-    (MIGRATIONS_DIR / "004_new2.py").unlink()
-
-    router.create("new3", auto="tests.models")
-    assert router.todo == ["001_test", "002_test", "003_tespy", "004_new3"]
-    (MIGRATIONS_DIR / "004_new3.py").unlink()
-
-    router.create("new4", auto=["tests.models"])
-    assert router.todo == ["001_test", "002_test", "003_tespy", "004_new4"]
-    (MIGRATIONS_DIR / "004_new4.py").unlink()
-
-    MigrateHistory.create(name="001_test")
-    assert router.diff == ["002_test", "003_tespy"]
-
-    MigrateHistory.delete().execute()
+    with router.database.atomic():
+        MigrateHistory.create(name="001_test")
+        assert router.diff == ["002_test", "003_tespy"]
+        MigrateHistory.delete().execute()
 
     router.run()
     assert router.diff == []
@@ -66,37 +56,135 @@ def test_router():
     assert router.diff == ["003_tespy"]
     assert migrations.count() == 2
 
-    with mock.patch("pathlib.Path.unlink") as mocked:
-        router.merge()
-        assert mocked.call_count == 3
-        assert MigrateHistory.select().count() == 1
-
-    (MIGRATIONS_DIR / "001_initial.py").unlink()
-
-    from peewee_migrate.router import load_models
-
-    models = load_models("tests.test_autodiscover")
-    assert models
+    router.merge()
+    assert router.todo == ["001_initial"]
+    assert MigrateHistory.select().count() == 1
 
     models = load_models("tests.test_autodiscover")
     assert models
+    assert load_models("tests.test_autodiscover") == models
 
     from .test_autodiscover.some_folder_one import one_models
 
     models = load_models(one_models)
     assert models
+    assert load_models(one_models) == models
 
-    models = load_models(one_models)
-    assert models
+
+@pytest.mark.parametrize(
+    "auto",
+    [False, Dummy, [Dummy], "tests.models", ["tests.models"]],
+    ids=["none", "model", "model_list", "module_str", "module_list"],
+)
+def test_router_create_variants(migrations_dir, auto):
+    router = get_router(migrations_dir, "sqlite:///:memory:")
+    router.create("new", auto=auto)
+    assert router.todo == ["001_test", "002_test", "003_tespy", "004_new"]
 
 
-def test_router_compile(tmpdir):
-    from peewee_migrate.cli import get_router
+def test_router_compile(tmp_path, monkeypatch):
+    written = []
+    monkeypatch.setattr(
+        "pathlib.Path.write_text", lambda path, data, **_: written.append((path.name, data))
+    )
+
+    router = get_router(tmp_path, "sqlite:///:memory:")
+    assert router.compile("test_router_compile") == "001_test_router_compile"
+
+    [(filename, content)] = written
+    assert filename == "001_test_router_compile.py"
+    assert "Peewee migrations -- 001_test_router_compile.py" in content
+
+
+@pytest.mark.parametrize(
+    "filename",
+    [
+        "001_test.py",
+        "001_.py",
+        "001_a.b.py",
+        "0011_a.py",
+        "01_a.py",
+        "001-a.py",
+        "001_a.pyc",
+        "001_a.py.bak",
+        "\u0661\u0662\u0663_a.py",
+        "\u00b9\u00b2\u00b3_a.py",
+        "conf.py",
+        "",
+    ],
+)
+def test_is_migration(filename):
+    assert _is_migration(filename) == bool(DEFAULT_FILEMASK.match(filename))
+
+
+def test_router_todo_skips_dirs(migrations_dir):
+    (migrations_dir / "004_x.py").mkdir()
+    router = get_router(migrations_dir, "sqlite:///:memory:")
+    assert router.todo == ["001_test", "002_test", "003_tespy"]
 
-    migrations = tmpdir.mkdir("migrations")
-    router = get_router(str(migrations), "sqlite:///:memory:")
-    router.compile("test_router_compile")
 
-    with migrations.join("001_test_router_compile.py").open() as f:
-        content = f.read()
-        assert content
+def test_router_todo_custom_filemask(migrations_dir, monkeypatch):
+    (migrations_dir / "0004_x.py").touch()
+    monkeypatch.setattr(Router, "filemask", re.compile(r"\d{4}_[^.]+\.py$"))
+    router = get_router(migrations_dir, "sqlite:///:memory:")
+    assert router.todo == ["0004_x"]
+
+
+def test_router_read(migrations_dir):
+    router = get_router(migrations_dir, "sqlite:///:memory:")
+    migrate, _ = router.read("001_test")
+    assert migrate is not void
+
+    path = migrations_dir / "001_test.py"
+    path.write_text("def migrate(migrator, database, fake=False):\n    migrator.append(1)\n")
+    migrate, rollback = router.read("001_test")
+    assert rollback is void
+
+    applied = []
+    migrate(applied, router.database)
+    assert applied == [1]
+
+
+def test_router_clear(migrations_dir):
+    router = get_router(migrations_dir, "sqlite:///:memory:")
+    paths = [(migrations_dir / (name + ".py")).absolute() for name in router.todo]
+    for name in router.todo:
+        router.read(name)
+    assert all(path in _CODE_CACHE for path in paths)
+
+    router.clear()
+    assert router.todo == []
+    assert not any(path in _CODE_CACHE for path in paths)
+
+
+@pytest.mark.filterwarnings('ignore:"PrimaryKeyField" has been renamed:DeprecationWarning')
+def test_compile_migrations():
+    class Legacy(pw.Model):
+        id = pw.PrimaryKeyField()
+
+    class Person(pw.Model):
+        name = pw.CharField()
+        legacy = pw.ForeignKeyField(Legacy)
+
+    migrator = Migrator(pw.SqliteDatabase(":memory:"))
+    assert compile_migrations(migrator, [Legacy, Person]) == "\n".join(
+        [
+            "",
+            "    @migrator.create_model",
+            "    class Legacy(pw.Model):",
+            "",
+            "        class Meta:",
+            '            table_name = "legacy"',
+            "",
+            "    @migrator.create_model",
+            "    class Person(pw.Model):",
+            "        id = pw.AutoField()",
+            "        name = pw.CharField(max_length=255)",
+            "        legacy = pw.ForeignKeyField("
+            "column_name='legacy_id', field='id', model=migrator.orm['legacy'])",
+            "",
+            "        class Meta:",
+            '            table_name = "person"',
+        ]
+    )
+    assert compile_migrations(migrator, []) == ""